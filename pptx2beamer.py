@@ -13,30 +13,214 @@ import os
 import argparse
 import zipfile
 import shutil
+import threading
 import tempfile
+import hashlib
+import functools
 import subprocess
-import xml.etree.ElementTree as ET
 from pathlib import Path
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 import re
+import posixpath
+
+# lxml parses and evaluates paths considerably faster than the pure-Python
+# ElementTree; fall back to the standard library when it is not installed.
+_PURE_PYTHON_XML = False
+try:
+    from lxml import etree as ET
+except ImportError:
+    import xml.etree.ElementTree as ET
+    try:
+        # ElementTree silently uses a much slower pure-Python parser without it
+        import _elementtree  # noqa: F401
+    except ImportError:
+        _PURE_PYTHON_XML = True
+
+# Relationship targets with these extensions are treated as images
+IMAGE_EXTENSIONS = ('.emf', '.png', '.jpg', '.jpeg', '.svg', '.bmp')
+
+# Number of background commands (\usebackground1, ...) offered to the user
+MAX_BACKGROUNDS = 5
+
+# A picture at least this large (EMU) and this close to the origin is a background
+_BG_MIN_CX, _BG_MIN_CY, _BG_MAX_XY = 7_000_000, 5_000_000, 100_000
+
+# Media files are streamed out of the archive in chunks of this size
+MEDIA_COPY_BUFFER_SIZE = 1024 * 1024
+
+# --- Compiled XML Paths ---
+
+# The one namespace map shared by every path in the module
+NS = {
+    'p': 'http://schemas.openxmlformats.org/presentationml/2006/main',
+    'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
+    'r': 'http://schemas.openxmlformats.org/officeDocument/2006/relationships',
+    'pkg': 'http://schemas.openxmlformats.org/package/2006/relationships'
+}
+
+def _compile_path(path):
+    """Compile an element path once; the result returns all matches for an element."""
+    if hasattr(ET, 'XPath'):
+        return ET.XPath(path, namespaces=NS)
+
+    # ElementTree has nothing to compile; bind the path and namespaces, and
+    # give _first a find() that stops at the first match
+    def find_all(elem):
+        return elem.findall(path, NS)
+    find_all.find = lambda elem: elem.find(path, NS)
+    return find_all
+
+def _first(compiled_path, elem):
+    """Return the first match of a compiled path, or None."""
+    find = getattr(compiled_path, 'find', None)
+    if find is not None:
+        return find(elem)
+    matches = compiled_path(elem)
+    return matches[0] if matches else None
+
+def _make_parser():
+    """Returns a fresh parser; whitespace-only text is never used, so lxml drops it."""
+    if hasattr(ET, 'XPath'):
+        return ET.XMLParser(remove_blank_text=True, huge_tree=False)
+    return ET.XMLParser()
+
+def _parse_part(zf, part_name):
+    """Parses a package part and returns its root element."""
+    with zf.open(part_name) as part_file:
+        return ET.parse(part_file, parser=_make_parser()).getroot()
+
+_CLR_SCHEME_PATH = _compile_path('.//a:clrScheme')
+_SRGB_CLR_PATH = _compile_path('a:srgbClr')
+_SYS_CLR_PATH = _compile_path('a:sysClr')
+_ALL_SRGB_CLR_PATH = _compile_path('.//a:srgbClr')
+_FONT_SCHEME_PATH = _compile_path('.//a:fontScheme')
+_MAJOR_LATIN_PATH = _compile_path('.//a:majorFont/a:latin')
+_MINOR_LATIN_PATH = _compile_path('.//a:minorFont/a:latin')
+_XFRM_PATH = _compile_path('.//a:xfrm')
+_ALL_SP_PATH = _compile_path('.//p:sp')
+_ALL_PIC_PATH = _compile_path('.//p:pic')
+_CNV_PR_PATH = _compile_path('.//p:cNvPr')
+_BG_SCHEME_CLR_PATH = _compile_path('p:bgPr/a:solidFill/a:schemeClr')
+_RELATIONSHIP_PATH = _compile_path('.//pkg:Relationship')
+_BARE_RELATIONSHIP_PATH = _compile_path('.//Relationship')
+
+# Clark-notation tags for direct child lookups and streaming scans, which
+# skip path parsing and prefix resolution altogether
+P_NS = f"{{{NS['p']}}}"
+A_NS = f"{{{NS['a']}}}"
+R_NS = f"{{{NS['r']}}}"
+
+PIC_TAG = P_NS + 'pic'
+SP_TAG = P_NS + 'sp'
+BLIP_TAG = A_NS + 'blip'
+BLIP_FILL_TAG = A_NS + 'blipFill'
+PIC_BLIP_FILL_TAG = P_NS + 'blipFill'
+BACKGROUND_TAGS = frozenset((P_NS + 'bg', P_NS + 'bgPr', A_NS + 'bgFillStyleLst'))
+OFF_TAG = A_NS + 'off'
+EXT_TAG = A_NS + 'ext'
+SOLID_FILL_TAG = A_NS + 'solidFill'
+SCHEME_CLR_TAG = A_NS + 'schemeClr'
+NV_PR_TAG = P_NS + 'nvPr'
+PH_TAG = P_NS + 'ph'
+XFRM_TAG = A_NS + 'xfrm'
+LVL1_PPR_TAG = A_NS + 'lvl1pPr'
+DEF_RPR_TAG = A_NS + 'defRPr'
+BODY_PR_TAG = A_NS + 'bodyPr'
+CSLD_TAG = P_NS + 'cSld'
+BG_TAG = P_NS + 'bg'
+OVERRIDE_CLR_MAPPING_TAG = A_NS + 'overrideClrMapping'
+LATIN_TAG = A_NS + 'latin'
+EMBED_ATTR = R_NS + 'embed'
+
+def _localname(tag):
+    """Strips the namespace from a Clark-notation tag."""
+    return tag.rpartition('}')[2]
+
+def _int_attr(elem, name, default=0):
+    """Reads an integer attribute, returning default when it is absent."""
+    value = elem.get(name)
+    return int(value) if value is not None else default
+
+def _list_parts(zf, folder, suffix='.xml'):
+    """Lists the parts stored directly in a folder of the package.
+
+    Only the parts listed here are ever read, so embedded objects, thumbnails
+    and other package content are never decompressed.
+    """
+    prefix = folder + '/'
+    start = len(prefix)
+    return [name for name in zf.namelist()
+            if name.startswith(prefix) and name.endswith(suffix)
+            and len(name) > start and '/' not in name[start:]]
+
+# Folders holding the XML parts the parsers read, keyed for _scan_ppt_dirs
+PPT_FOLDERS = {
+    'slides': 'ppt/slides',
+    'masters': 'ppt/slideMasters',
+    'layouts': 'ppt/slideLayouts'
+}
+
+def _scan_ppt_dirs(zf):
+    """Lists the slide, master and layout parts in one pass over the archive index.
+
+    Returns a dict keyed like PPT_FOLDERS, in archive order.
+    """
+    keys = {folder: key for key, folder in PPT_FOLDERS.items()}
+    part_index = {key: [] for key in PPT_FOLDERS}
+    for name in zf.namelist():
+        folder, _, base = name.rpartition('/')
+        key = keys.get(folder)
+        if key is not None and base.endswith('.xml'):
+            part_index[key].append(name)
+    return part_index
+
+def _has_part(zf, part_name):
+    """Checks for a part using the archive's own name index, without a listing."""
+    try:
+        zf.getinfo(part_name)
+    except KeyError:
+        return False
+    return True
+
+def _map_parts(parse_part, parts):
+    """Applies parse_part to each part on a thread pool, keeping input order.
+
+    Parts are independent; zipfile serialises reads of the shared archive,
+    while decompression (and parsing, under lxml) runs without the GIL.
+    """
+    if len(parts) < 2:
+        return [parse_part(part) for part in parts]
+    max_workers = min(len(parts), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(parse_part, parts))
+
+def _rels_part(part_name):
+    """Returns the name of the relationships part belonging to a part."""
+    folder, name = posixpath.split(part_name)
+    return posixpath.join(folder, '_rels', f'{name}.rels')
+
+# Deletes every ASCII character except letters and digits
+_SANITIZE_TABLE = {c: None for c in range(128) if not chr(c).isalnum()}
+_SANITIZE_PATTERN = re.compile(r'[^a-zA-Z0-9]')
 
 def sanitize_for_latex(text):
     """Remove characters that are invalid for LaTeX command names."""
-    return re.sub(r'[^a-zA-Z0-9]', '', text)
+    if text.isascii():
+        return text.translate(_SANITIZE_TABLE)
+    return _SANITIZE_PATTERN.sub('', text)
 
 # --- XML Parsing Functions ---
 
-def parse_theme_xml(theme_path):
+def parse_theme_xml(zf, theme_part):
     """Parses the theme1.xml file for colors and fonts."""
-    if not theme_path.exists():
-        print(f"Warning: Theme file {theme_path} not found.")
+    if not _has_part(zf, theme_part):
+        print(f"Warning: Theme file {theme_part} not found.")
         return {}, {}
 
-    ns = {'a': 'http://schemas.openxmlformats.org/drawingml/2006/main'}
-
     try:
-        tree = ET.parse(theme_path)
-        root = tree.getroot()
+        root = _parse_part(zf, theme_part)
     except ET.ParseError as e:
         print(f"Warning: Could not parse theme XML: {e}")
         return {}, {}
@@ -45,12 +229,12 @@ def parse_theme_xml(theme_path):
     colors = {}
     
     # Standard theme colors
-    color_scheme = root.find('.//a:clrScheme', ns)
-    if color_scheme:
+    color_scheme = _first(_CLR_SCHEME_PATH, root)
+    if color_scheme is not None:
         for color_element in color_scheme:
-            tag_name = color_element.tag.split('}')[-1]
-            srgb_color = color_element.find('a:srgbClr', ns)
-            sys_color = color_element.find('a:sysClr', ns)
+            tag_name = _localname(color_element.tag)
+            srgb_color = _first(_SRGB_CLR_PATH, color_element)
+            sys_color = _first(_SYS_CLR_PATH, color_element)
             if srgb_color is not None:
                 colors[tag_name] = srgb_color.get('val')
             elif sys_color is not None:
@@ -69,64 +253,61 @@ def parse_theme_xml(theme_path):
             colors['tx2'] = colors['dk2']  # Text 2 = Dark 2
     
     # Custom colors (often defined in theme extras)
-    custom_colors = root.findall('.//a:srgbClr', ns)
+    custom_colors = _ALL_SRGB_CLR_PATH(root)
+    seen_values = set(colors.values())
     for i, custom_color in enumerate(custom_colors):
         val = custom_color.get('val')
-        if val and val not in colors.values():
+        if val and val not in seen_values:
             colors[f'custom{i+1}'] = val
+            seen_values.add(val)
 
     # Extract fonts
     fonts = {}
-    font_scheme = root.find('.//a:fontScheme', ns)
-    if font_scheme:
-        major_font_element = font_scheme.find('.//a:majorFont/a:latin', ns)
+    font_scheme = _first(_FONT_SCHEME_PATH, root)
+    if font_scheme is not None:
+        major_font_element = _first(_MAJOR_LATIN_PATH, font_scheme)
         if major_font_element is not None:
             fonts['major'] = major_font_element.get('typeface')
 
-        minor_font_element = font_scheme.find('.//a:minorFont/a:latin', ns)
+        minor_font_element = _first(_MINOR_LATIN_PATH, font_scheme)
         if minor_font_element is not None:
             fonts['minor'] = minor_font_element.get('typeface')
 
     return colors, fonts
 
-def extract_fonts_from_slides(ppt_dir):
+def _fonts_in_part(zf, xml_part):
+    """Returns the typefaces referenced in one part, or none if it cannot be parsed."""
+    part_fonts = set()
+    try:
+        # Stream the part, dropping each element once it has been seen
+        with zf.open(xml_part) as xml_file:
+            for _, elem in ET.iterparse(xml_file):
+                # Look for font references in text runs
+                if elem.tag == LATIN_TAG:
+                    typeface = elem.get('typeface')
+                    if typeface:
+                        part_fonts.add(typeface)
+                elem.clear()
+    except ET.ParseError:
+        return set()
+    return part_fonts
+
+def extract_fonts_from_slides(zf, part_index=None):
     """Extracts font information from actual slide content."""
     fonts_found = set()
-    ns = {
-        'p': 'http://schemas.openxmlformats.org/presentationml/2006/main',
-        'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
-        'r': 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
-    }
+    if part_index is None:
+        part_index = _scan_ppt_dirs(zf)
     
     # Search in slides, masters, and layouts
-    search_dirs = [
-        ppt_dir / 'ppt' / 'slides',
-        ppt_dir / 'ppt' / 'slideMasters', 
-        ppt_dir / 'ppt' / 'slideLayouts'
-    ]
-    
-    for search_dir in search_dirs:
-        if not search_dir.exists():
-            continue
-            
-        for xml_file in search_dir.glob('*.xml'):
-            try:
-                tree = ET.parse(xml_file)
-                root = tree.getroot()
-                
-                # Look for font references in text runs
-                font_elements = root.findall('.//a:latin', ns)
-                for font_elem in font_elements:
-                    typeface = font_elem.get('typeface')
-                    if typeface:
-                        fonts_found.add(typeface)
-                        
-            except ET.ParseError:
-                continue
+    xml_parts = part_index['slides'] + part_index['masters'] + part_index['layouts']
+
+    # Parts are independent, so they are scanned in parallel
+    for part_fonts in _map_parts(lambda xml_part: _fonts_in_part(zf, xml_part), xml_parts):
+        fonts_found.update(part_fonts)
     
     return sorted(list(fonts_found))
 
-def parse_slide_master_styling(ppt_dir):
+def parse_slide_master_styling(zf, part_index=None):
     """Extracts title/footer styling information from slide masters."""
     styling_info = {
         'has_footer_elements': False,
@@ -134,37 +315,29 @@ def parse_slide_master_styling(ppt_dir):
         'footer_elements': []
     }
     
-    ns = {
-        'p': 'http://schemas.openxmlformats.org/presentationml/2006/main',
-        'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
-        'r': 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
-    }
-    
-    masters_dir = ppt_dir / 'ppt' / 'slideMasters'
-    if not masters_dir.exists():
-        return styling_info
-    
-    for master_file in masters_dir.glob('*.xml'):
+    if part_index is None:
+        part_index = _scan_ppt_dirs(zf)
+
+    for master_part in part_index['masters']:
         try:
-            tree = ET.parse(master_file)
-            root = tree.getroot()
+            root = _parse_part(zf, master_part)
             
             # Look for footer elements (rectangles, logos, etc.)
-            shapes = root.findall('.//p:sp', ns) + root.findall('.//p:pic', ns)
+            shapes = list(_ALL_SP_PATH(root)) + list(_ALL_PIC_PATH(root))
             
             for shape in shapes:
                 # Check position - if in bottom area of slide, likely footer
-                xfrm = shape.find('.//a:xfrm', ns)
+                xfrm = _first(_XFRM_PATH, shape)
                 if xfrm is not None:
-                    off = xfrm.find('a:off', ns)
+                    off = xfrm.find(OFF_TAG)
                     if off is not None:
-                        y = int(off.get('y', '0'))
+                        y = _int_attr(off, 'y')
                         # If positioned in bottom 20% of slide (>5.5M EMU for standard slide)
                         if y > 5500000:
                             styling_info['has_footer_elements'] = True
                             
                             # Identify element type
-                            cNvPr = shape.find('.//p:cNvPr', ns)
+                            cNvPr = _first(_CNV_PR_PATH, shape)
                             if cNvPr is not None:
                                 name = cNvPr.get('name', '').lower()
                                 if 'rectangle' in name:
@@ -177,261 +350,468 @@ def parse_slide_master_styling(ppt_dir):
     
     return styling_info
 
-def parse_slide_layouts(ppt_dir, theme_colors):
-    """Parses all slide layouts for their specific styling."""
-    layouts = {}
-    ns = {
-        'p': 'http://schemas.openxmlformats.org/presentationml/2006/main',
-        'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
-        'r': 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+def _parse_placeholder(sp):
+    """Extracts the key, position and styling of a placeholder shape.
+
+    Returns None when the shape is not a placeholder.
+    """
+    # Collect what the placeholder needs in a single walk of the
+    # shape; for every lookup only the first match counts
+    first = {}
+    ph = color_element = lvl1_def_rpr = None
+    for elem in sp.iter():
+        tag = elem.tag
+        if tag not in first:
+            first[tag] = elem
+        if tag == NV_PR_TAG:
+            if ph is None:
+                ph = elem.find(PH_TAG)
+        elif tag == SOLID_FILL_TAG:
+            if color_element is None:
+                color_element = elem.find(SCHEME_CLR_TAG)
+        elif tag == LVL1_PPR_TAG:
+            if lvl1_def_rpr is None:
+                lvl1_def_rpr = elem.find(DEF_RPR_TAG)
+
+    if ph is None:
+        return None
+
+    ph_type = ph.get('type', 'body')
+    ph_idx = ph.get('idx', '0')
+    
+    # Create unique placeholder key for multiple placeholders of same type
+    placeholder_key = f"{ph_type}_{ph_idx}" if ph_idx != '0' else ph_type
+    
+    # Extract positioning information from xfrm element
+    position = {'x': 0, 'y': 0, 'width': 0, 'height': 0}
+    xfrm = first.get(XFRM_TAG)
+    if xfrm is not None:
+        off = xfrm.find(OFF_TAG)
+        ext = xfrm.find(EXT_TAG)
+        if off is not None:
+            position['x'] = _int_attr(off, 'x')
+            position['y'] = _int_attr(off, 'y')
+        if ext is not None:
+            position['width'] = _int_attr(ext, 'cx')
+            position['height'] = _int_attr(ext, 'cy')
+    
+    # Extract styling information
+    styling = {
+        'color': None,
+        'font_size': None,
+        'bold': False,
+        'alignment': 'left',
+        'anchor': 'top'
+    }
+    
+    # Look for color in different places within the placeholder.
+    # Every candidate location (list style, default run
+    # properties, shape fill) ends in solidFill/schemeClr, so
+    # the first such pair in document order wins
+    if color_element is not None:
+        styling['color'] = color_element.get('val')
+    
+    # Extract font size
+    font_size_element = lvl1_def_rpr
+    if font_size_element is None:
+        font_size_element = first.get(DEF_RPR_TAG)
+    if font_size_element is not None:
+        sz = font_size_element.get('sz')
+        if sz:
+            styling['font_size'] = int(sz) / 100  # Convert from PowerPoint units to points
+        styling['bold'] = font_size_element.get('b') == '1'
+    
+    # Extract alignment
+    alignment_element = first.get(LVL1_PPR_TAG)
+    if alignment_element is not None:
+        algn = alignment_element.get('algn', 'l')
+        alignment_map = {'l': 'left', 'r': 'right', 'ctr': 'center', 'j': 'justify'}
+        styling['alignment'] = alignment_map.get(algn, 'left')
+    
+    # Extract anchor (vertical alignment)
+    anchor_element = first.get(BODY_PR_TAG)
+    if anchor_element is not None:
+        anchor = anchor_element.get('anchor', 't')
+        anchor_map = {'t': 'top', 'b': 'bottom', 'ctr': 'center'}
+        styling['anchor'] = anchor_map.get(anchor, 'top')
+
+    return placeholder_key, {
+        'type': ph_type,
+        'index': ph_idx,
+        'position': position,
+        'styling': styling
     }
 
-    layout_dir = ppt_dir / 'ppt' / 'slideLayouts'
-    if not layout_dir.exists():
-        return layouts
+def _parse_layout(zf, layout_part, rels_cache):
+    """Parses one slide layout; returns None if it cannot be read.
 
-    for layout_file in layout_dir.glob('*.xml'):
-        try:
-            tree = ET.parse(layout_file)
-            root = tree.getroot()
-            
-            layout_name = root.find('.//p:cSld', ns).get('name')
-            layouts[layout_name] = {
-                'name': layout_name,
-                'color_overrides': {},
-                'placeholders': {},
-                'background_color': None,
-                'background_image': None
-            }
-
-            # Parse color overrides
-            color_map_override = root.find('.//p:clrMapOvr/a:overrideClrMapping', ns)
-            if color_map_override is not None:
-                for key, value in color_map_override.attrib.items():
-                    layouts[layout_name]['color_overrides'][key] = value
-
-            # Find solid background color
-            bg_element = root.find('.//p:bg/p:bgPr/a:solidFill/a:schemeClr', ns)
-            if bg_element is not None:
-                bg_color = bg_element.get('val')
-                layouts[layout_name]['background_color'] = bg_color
-
-            # Find placeholders with detailed positioning and styling
-            for sp in root.findall('.//p:sp', ns):
-                ph = sp.find('.//p:nvPr/p:ph', ns)
-                if ph is not None:
-                    ph_type = ph.get('type', 'body')
-                    ph_idx = ph.get('idx', '0')
-                    
-                    # Create unique placeholder key for multiple placeholders of same type
-                    placeholder_key = f"{ph_type}_{ph_idx}" if ph_idx != '0' else ph_type
-                    
-                    # Extract positioning information from xfrm element
-                    position = {'x': 0, 'y': 0, 'width': 0, 'height': 0}
-                    xfrm = sp.find('.//a:xfrm', ns)
-                    if xfrm is not None:
-                        off = xfrm.find('.//a:off', ns)
-                        ext = xfrm.find('.//a:ext', ns)
-                        if off is not None:
-                            position['x'] = int(off.get('x', 0))
-                            position['y'] = int(off.get('y', 0))
-                        if ext is not None:
-                            position['width'] = int(ext.get('cx', 0))
-                            position['height'] = int(ext.get('cy', 0))
-                    
-                    # Extract styling information
-                    styling = {
-                        'color': None,
-                        'font_size': None,
-                        'bold': False,
-                        'alignment': 'left',
-                        'anchor': 'top'
-                    }
-                    
-                    # Look for color in different places within the placeholder
-                    color_sources = [
-                        './/a:solidFill/a:schemeClr',
-                        './/a:lvl1pPr/a:defRPr/a:solidFill/a:schemeClr',
-                        './/a:defRPr/a:solidFill/a:schemeClr',
-                        './/a:lstStyle/a:lvl1pPr/a:defRPr/a:solidFill/a:schemeClr'
-                    ]
-                    
-                    for color_path in color_sources:
-                        color_element = sp.find(color_path, ns)
-                        if color_element is not None:
-                            styling['color'] = color_element.get('val')
-                            break
-                    
-                    # Extract font size
-                    font_size_element = sp.find('.//a:lvl1pPr/a:defRPr', ns) or sp.find('.//a:defRPr', ns)
-                    if font_size_element is not None:
-                        sz = font_size_element.get('sz')
-                        if sz:
-                            styling['font_size'] = int(sz) / 100  # Convert from PowerPoint units to points
-                        styling['bold'] = font_size_element.get('b') == '1'
-                    
-                    # Extract alignment
-                    alignment_element = sp.find('.//a:lvl1pPr', ns)
-                    if alignment_element is not None:
-                        algn = alignment_element.get('algn', 'l')
-                        alignment_map = {'l': 'left', 'r': 'right', 'ctr': 'center', 'j': 'justify'}
-                        styling['alignment'] = alignment_map.get(algn, 'left')
-                    
-                    # Extract anchor (vertical alignment)
-                    anchor_element = sp.find('.//a:bodyPr', ns)
-                    if anchor_element is not None:
-                        anchor = anchor_element.get('anchor', 't')
-                        anchor_map = {'t': 'top', 'b': 'bottom', 'ctr': 'center'}
-                        styling['anchor'] = anchor_map.get(anchor, 'top')
-                    
-                    # Store both color (for backward compatibility) and full styling info
-                    layouts[layout_name]['placeholders'][placeholder_key] = styling['color']
-                    
-                    # Store detailed placeholder information in a new structure
-                    if 'detailed_placeholders' not in layouts[layout_name]:
-                        layouts[layout_name]['detailed_placeholders'] = {}
-                    
-                    layouts[layout_name]['detailed_placeholders'][placeholder_key] = {
-                        'type': ph_type,
-                        'index': ph_idx,
-                        'position': position,
-                        'styling': styling
-                    }
-
-            # Find background image for this layout
-            rels_file = layout_dir / '_rels' / f'{layout_file.name}.rels'
-            if rels_file.exists():
-                image_name = find_background_image_in_xml(layout_file, rels_file, ns)
-                if image_name:
-                    layouts[layout_name]['background_image'] = image_name
+    Styling, placeholders and the background image all come from a single
+    streaming pass over the layout.
+    """
+    has_common_data = False
+    layout_name = None
+    color_overrides = {}
+    background_color = None
+    background_image = None
+    detailed_placeholders = {}
+
+    # Background images are resolved through the layout's relationships
+    rels_part = _rels_part(layout_part)
+    scan_background = _has_part(zf, rels_part)
+    background_depth = 0
 
-        except (ET.ParseError, AttributeError):
-            continue
+    try:
+        with zf.open(layout_part) as layout_file:
+            for event, elem in ET.iterparse(layout_file, events=('start', 'end')):
+                tag = elem.tag
+                if event == 'start':
+                    if tag in BACKGROUND_TAGS:
+                        background_depth += 1
+                    continue
+                if tag in BACKGROUND_TAGS:
+                    background_depth -= 1
+
+                # Find background image for this layout
+                if scan_background and background_image is None:
+                    background_image = _match_background(zf, rels_part, rels_cache, tag, elem,
+                                                         background_depth > 0)
+
+                if tag == SP_TAG:
+                    # Find placeholders with detailed positioning and styling
+                    placeholder = _parse_placeholder(elem)
+                    if placeholder is not None:
+                        placeholder_key, details = placeholder
+                        detailed_placeholders[placeholder_key] = details
+                    elem.clear()
+
+                elif tag == PIC_TAG:
+                    elem.clear()
+
+                elif tag == BG_TAG:
+                    # Find solid background color
+                    if background_color is None:
+                        bg_element = _first(_BG_SCHEME_CLR_PATH, elem)
+                        if bg_element is not None:
+                            background_color = bg_element.get('val')
+
+                elif tag == OVERRIDE_CLR_MAPPING_TAG:
+                    # Parse color overrides
+                    if not color_overrides:
+                        color_overrides = dict(elem.attrib)
+
+                elif tag == CSLD_TAG:
+                    if not has_common_data:
+                        has_common_data = True
+                        layout_name = elem.get('name')
+                    elem.clear()
+
+    except ET.ParseError:
+        return None
+    if not has_common_data:
+        return None
+
+    layout = {
+        'name': layout_name,
+        # LaTeX environment and template name, shared by all generated files
+        'env_name': sanitize_for_latex(layout_name).lower(),
+        'color_overrides': color_overrides,
+        # Store both color (for backward compatibility) and full styling info
+        'placeholders': {key: details['styling']['color']
+                         for key, details in detailed_placeholders.items()},
+        'background_color': background_color,
+        'background_image': background_image
+    }
+    if detailed_placeholders:
+        layout['detailed_placeholders'] = detailed_placeholders
+
+    return layout
+
+def parse_slide_layouts(zf, theme_colors, rels_cache=None, part_index=None):
+    """Parses all slide layouts for their specific styling.
+
+    Layouts are streamed with ``iterparse``; each shape's subtree is released
+    once its placeholder details are taken, though the emptied shape elements
+    stay in the tree until the layout is done. Layouts are independent and
+    parsed in parallel.
+    """
+    layouts = {}
+    if rels_cache is None:
+        rels_cache = {}
+
+    if part_index is None:
+        part_index = _scan_ppt_dirs(zf)
+
+    layout_parts = part_index['layouts']
+    parsed = _map_parts(lambda part: _parse_layout(zf, part, rels_cache), layout_parts)
+    for layout in parsed:
+        if layout is not None:
+            layouts[layout['name']] = layout
             
     return layouts
 
 
-def find_background_images(ppt_dir):
-    """Finds background images from slide masters and layouts."""
+def find_background_images(zf, rels_cache=None, max_backgrounds=MAX_BACKGROUNDS, part_index=None):
+    """Finds background images from slide masters and layouts.
+
+    Scanning stops once max_backgrounds distinct images have been found.
+    """
     backgrounds = {}
-    ns = {
-        'p': 'http://schemas.openxmlformats.org/presentationml/2006/main',
-        'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
-        'r': 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
-    }
+    if rels_cache is None:
+        rels_cache = {}
+    if part_index is None:
+        part_index = _scan_ppt_dirs(zf)
 
     # Search in both masters and layouts
-    search_dirs = [
-        ('masters', ppt_dir / 'ppt' / 'slideMasters'),
-        ('layouts', ppt_dir / 'ppt' / 'slideLayouts')
-    ]
+    for dir_type in ('masters', 'layouts'):
+        for xml_part in part_index[dir_type]:
+            rels_part = _rels_part(xml_part)
+            if not _has_part(zf, rels_part):
+                continue
 
-    for dir_type, search_dir in search_dirs:
-        if not search_dir.exists():
-            continue
+            # A background is always one of the part's image relationships;
+            # if all of them are already known, parsing cannot add a new one
+            candidates = _cached_image_rels(zf, rels_part, rels_cache).values()
+            if all(name in backgrounds for name in candidates):
+                continue
 
-        for xml_file in search_dir.glob('*.xml'):
-            rels_file = search_dir / '_rels' / f'{xml_file.name}.rels'
-            if rels_file.exists():
-                image_name = find_background_image_in_xml(xml_file, rels_file, ns)
-                if image_name and image_name not in backgrounds:
-                    cmd_name = f"usebackground{len(backgrounds) + 1}"
-                    backgrounds[image_name] = cmd_name
+            image_name = find_background_image_in_xml(zf, xml_part, rels_part, rels_cache)
+            if image_name and image_name not in backgrounds:
+                cmd_name = f"usebackground{len(backgrounds) + 1}"
+                backgrounds[image_name] = cmd_name
+                if len(backgrounds) >= max_backgrounds:
+                    return backgrounds
 
     return backgrounds
 
-def find_background_image_in_xml(xml_path, rels_path, ns):
-    """Helper to find background images in a given XML file."""
+def _match_background(zf, rels_part, rels_cache, tag, elem, in_background):
+    """Checks one closed element of a streamed part for a background image.
+
+    A blip fill counts only inside a background fill; a picture counts when
+    it is large and positioned like a background. Returns the image filename
+    or None.
+    """
+    if tag == BLIP_FILL_TAG:
+        if not in_background:
+            return None
+        # Explicit background fill
+        blip = elem.find(BLIP_TAG)
+
+    elif tag == PIC_TAG:
+        # Large pictures that cover the slide act as backgrounds
+        xfrm = next(elem.iter(XFRM_TAG), None)
+        if xfrm is None:
+            return None
+        off = xfrm.find(OFF_TAG)
+        ext = xfrm.find(EXT_TAG)
+        if off is None or ext is None:
+            return None
+
+        x = _int_attr(off, 'x')
+        y = _int_attr(off, 'y')
+        cx = _int_attr(ext, 'cx')
+        cy = _int_attr(ext, 'cy')
+
+        # Check if this picture is large and positioned like a background
+        if not (cx > _BG_MIN_CX and cy > _BG_MIN_CY
+                and x < _BG_MAX_XY and y < _BG_MAX_XY):
+            return None
+        blip_fill = next(elem.iter(PIC_BLIP_FILL_TAG), None)
+        if blip_fill is None:
+            return None
+        blip = blip_fill.find(BLIP_TAG)
+
+    else:
+        return None
+
+    if blip is None:
+        return None
+    r_id = blip.get(EMBED_ATTR)
+    if not r_id:
+        return None
+    return get_image_from_relationship(zf, rels_part, r_id, rels_cache)
+
+def find_background_image_in_xml(zf, xml_part, rels_part, rels_cache=None):
+    """Helper to find background images in a given XML file.
+
+    The file is streamed once with ``iterparse``: a blip inside a background
+    fill (``p:bg``, ``p:bgPr``, ``a:bgFillStyleLst``) wins, otherwise the first
+    large picture positioned like a background. ``p:bg`` precedes ``p:spTree``
+    in the schema, so stopping at the first match keeps that priority.
+    """
+    if rels_cache is None:
+        # Several blips may be looked up; parse the rels part only once
+        rels_cache = {}
+    background_depth = 0
     try:
-        tree = ET.parse(xml_path)
-        root = tree.getroot()
-
-        # First, look for actual background fills
-        background_patterns = [
-            './/p:cSld/p:bg//a:blipFill',
-            './/p:bgPr//a:blipFill',
-            './/p:bg//a:blipFill',
-            './/a:bgFillStyleLst//a:blipFill',
-        ]
+        with zf.open(xml_part) as xml_file:
+            for event, elem in ET.iterparse(xml_file, events=('start', 'end')):
+                tag = elem.tag
+                if event == 'start':
+                    if tag in BACKGROUND_TAGS:
+                        background_depth += 1
+                    continue
+
+                if tag in BACKGROUND_TAGS:
+                    background_depth -= 1
+                    continue
+
+                image_name = _match_background(zf, rels_part, rels_cache, tag, elem, background_depth > 0)
+                if image_name:
+                    return image_name
 
-        for pattern in background_patterns:
-            blip_fill = root.find(pattern, ns)
-            if blip_fill is not None:
-                blip = blip_fill.find('a:blip', ns)
-                if blip is not None:
-                    r_id = blip.get(f'{{{ns["r"]}}}embed')
-                    if r_id:
-                        image_name = get_image_from_relationship(rels_path, r_id)
-                        if image_name:
-                            return image_name
-
-        # If no explicit background, look for large pictures that cover the slide
-        pictures = root.findall('.//p:pic', ns)
-
-        for pic in pictures:
-            # Get the picture dimensions and position
-            xfrm = pic.find('.//a:xfrm', ns)
-            if xfrm is not None:
-                off = xfrm.find('a:off', ns)
-                ext = xfrm.find('a:ext', ns)
-
-                if off is not None and ext is not None:
-                    x = int(off.get('x', '0'))
-                    y = int(off.get('y', '0'))
-                    cx = int(ext.get('cx', '0'))
-                    cy = int(ext.get('cy', '0'))
-
-                    # Check if this picture is large and positioned like a background
-                    is_large = cx > 7000000 and cy > 5000000
-                    is_positioned_as_bg = x < 100000 and y < 100000
-
-                    if is_large and is_positioned_as_bg:
-                        # This looks like a background image
-                        blip_fill = pic.find('.//p:blipFill', ns)
-                        if blip_fill is not None:
-                            blip = blip_fill.find('a:blip', ns)
-                            if blip is not None:
-                                r_id = blip.get(f'{{{ns["r"]}}}embed')
-                                if r_id:
-                                    image_name = get_image_from_relationship(rels_path, r_id)
-                                    if image_name:
-                                        return image_name
+                if tag == PIC_TAG or tag == SP_TAG:
+                    # Shapes hold no further backgrounds; release them as we go
+                    elem.clear()
 
     except ET.ParseError:
         pass
     return None
 
-def get_image_from_relationship(rels_path, r_id):
-    """Get image filename from relationship ID."""
+def _load_rels(zf, rels_part):
+    """Parse a relationships part once into a {relationship ID: image filename} map.
+
+    Relationships that do not point at an image file are left out.
+    """
     try:
-        rels_tree = ET.parse(rels_path)
+        rels_root = _parse_part(zf, rels_part)
+    except (ET.ParseError, KeyError):
+        return {}
+
+    # Handle namespace for relationships XML
+    relationships = _RELATIONSHIP_PATH(rels_root)
+
+    # Fallback to no namespace if the above doesn't work
+    if not relationships:
+        relationships = _BARE_RELATIONSHIP_PATH(rels_root)
+
+    images = {}
+    for rel in relationships:
+        target = rel.get('Target', '')
+        # Only keep image files
+        if target.lower().endswith(IMAGE_EXTENSIONS):
+            images[rel.get('Id')] = posixpath.basename(target)
+    return images
+
+def _cached_image_rels(zf, rels_part, rels_cache):
+    """Returns the image map of a rels part, parsing it only on first use."""
+    images = rels_cache.get(rels_part)
+    if images is None:
+        images = rels_cache[rels_part] = _load_rels(zf, rels_part)
+    return images
+
+def get_image_from_relationship(zf, rels_part, r_id, rels_cache=None):
+    """Get image filename from relationship ID.
+
+    rels_cache maps rels part names to their parsed image maps; sharing one
+    dict across calls parses each rels part only once.
+    """
+    if rels_cache is None:
+        return _load_rels(zf, rels_part).get(r_id)
+    return _cached_image_rels(zf, rels_part, rels_cache).get(r_id)
 
-        # Handle namespace for relationships XML
-        rels_ns = {'pkg': 'http://schemas.openxmlformats.org/package/2006/relationships'}
-        relationships = rels_tree.findall('.//pkg:Relationship', rels_ns)
+# --- Image Conversion ---
 
-        # Fallback to no namespace if the above doesn't work
-        if not relationships:
-            relationships = rels_tree.findall('.//Relationship')
+def _convert_emf_with_shell(inkscape_path, emf_files):
+    """Converts EMF files in a single `inkscape --shell` session.
 
-        for rel in relationships:
-            rel_id = rel.get('Id')
-            target = rel.get('Target', '')
+    Returns the files that were not converted, so the caller can retry them
+    one at a time (e.g. with an Inkscape release that predates actions).
+    """
+    # Shell actions are separated by ';' and lines, and both the EMF and the
+    # PDF path go into the action line, so such paths cannot be batched
+    batchable = [f for f in emf_files
+                 if not any(c in str(path) for path in (f, f.with_suffix('.pdf'))
+                            for c in ';\n')]
+    if not batchable:
+        return emf_files
+
+    script = ''.join(
+        f"file-open:{f}; export-filename:{f.with_suffix('.pdf')}; export-do; file-close\n"
+        for f in batchable
+    ) + "quit\n"
+    try:
+        subprocess.run([inkscape_path, '--shell'], input=script,
+                       capture_output=True, text=True, check=True)
+    except OSError:
+        return emf_files
+    except subprocess.CalledProcessError:
+        # The session may have died part-way; keep whatever it exported
+        pass
+
+    remaining = []
+    for emf_file in emf_files:
+        pdf_file = emf_file.with_suffix('.pdf')
+        if emf_file in batchable and pdf_file.exists():
+            print(f"  ✓ Converted {emf_file.name} to {pdf_file.name}")
+        else:
+            remaining.append(emf_file)
+    return remaining
 
-            if rel_id == r_id:
-                # Only return image files
-                if target and any(target.lower().endswith(ext) for ext in ['.emf', '.png', '.jpg', '.jpeg', '.svg', '.bmp']):
-                    return Path(target).name
+def _convert_emf_batch(inkscape_path, emf_files):
+    """Converts EMF files with one `inkscape --export-type=pdf` command line.
 
-    except ET.ParseError:
+    Each PDF is written next to its EMF file. Returns the files that were not
+    converted.
+    """
+    try:
+        subprocess.run([inkscape_path, '--export-type=pdf', *map(str, emf_files)],
+                       capture_output=True, text=True, check=True)
+    except OSError:
+        return emf_files
+    except subprocess.CalledProcessError:
+        # Some inputs may have failed; keep whatever was exported
         pass
-    return None
 
-# --- Image Conversion ---
+    remaining = []
+    for emf_file in emf_files:
+        pdf_file = emf_file.with_suffix('.pdf')
+        if pdf_file.exists():
+            print(f"  ✓ Converted {emf_file.name} to {pdf_file.name}")
+        else:
+            remaining.append(emf_file)
+    return remaining
 
-def convert_emf_to_pdf(output_dir):
-    """Converts EMF files to PDF using inkscape if available."""
-    emf_files = list(output_dir.glob('*.emf'))
+def _convert_one_emf(emf_file, inkscape_path):
+    """Converts a single EMF file; returns (converted, status message)."""
+    pdf_file = emf_file.with_suffix('.pdf')
+    try:
+        subprocess.run([
+            inkscape_path,
+            f'--export-filename={pdf_file}',
+            str(emf_file)
+        ], check=True, capture_output=True, text=True)
+        return True, f"  ✓ Converted {emf_file.name} to {pdf_file.name}"
+    except subprocess.CalledProcessError as e:
+        return False, f"  ✗ Failed to convert {emf_file.name}: {e.stderr.strip()}"
+    except Exception as e:
+        return False, f"  ✗ Error converting {emf_file.name}: {e}"
+
+def _reuse_previous_pdf(emf_file, previous_dir):
+    """Copies the PDF of an unchanged EMF file from an earlier run, if present."""
+    previous_emf = previous_dir / emf_file.name
+    previous_pdf = previous_emf.with_suffix('.pdf')
+    if not previous_pdf.is_file() or not previous_emf.is_file():
+        return False
+    if file_digest(previous_emf) != file_digest(emf_file):
+        return False
+    shutil.copy2(previous_pdf, emf_file.with_suffix('.pdf'))
+    return True
+
+def convert_emf_to_pdf(output_dir, previous_dir=None):
+    """Converts EMF files to PDF using inkscape if available.
+
+    If previous_dir holds an identical EMF file together with its PDF from an
+    earlier run, that PDF is reused instead of running inkscape again.
+    """
+    with os.scandir(output_dir) as entries:
+        emf_files = [Path(entry.path) for entry in entries
+                     if entry.name.endswith('.emf') and entry.is_file()]
+    if previous_dir is not None:
+        reused_count = len(emf_files)
+        emf_files = [f for f in emf_files if not _reuse_previous_pdf(f, previous_dir)]
+        reused_count -= len(emf_files)
+        if reused_count:
+            print(f"Reused {reused_count} previously converted PDF files")
     if not emf_files:
         return
 
@@ -442,143 +822,319 @@ def convert_emf_to_pdf(output_dir):
         return
 
     print("Converting EMF images to PDF...")
-    converted_count = 0
 
-    for emf_file in emf_files:
-        pdf_file = emf_file.with_suffix('.pdf')
-        try:
-            result = subprocess.run([
-                inkscape_path,
-                f'--export-filename={pdf_file}',
-                str(emf_file)
-            ], check=True, capture_output=True, text=True)
-
-            print(f"  ✓ Converted {emf_file.name} to {pdf_file.name}")
-            converted_count += 1
-        except subprocess.CalledProcessError as e:
-            print(f"  ✗ Failed to convert {emf_file.name}: {e.stderr.strip()}")
-        except Exception as e:
-            print(f"  ✗ Error converting {emf_file.name}: {e}")
+    # One Inkscape process for all files, first as a shell session and then
+    # as a single command line; anything both missed is retried below
+    remaining = _convert_emf_with_shell(inkscape_path, emf_files)
+    if remaining:
+        remaining = _convert_emf_batch(inkscape_path, remaining)
+    converted_count = len(emf_files) - len(remaining)
+
+    # The per-file invocations are independent, so overlap them and report
+    # each one as soon as it finishes
+    if remaining:
+        max_workers = min(len(remaining), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(_convert_one_emf, emf_file, inkscape_path)
+                       for emf_file in remaining]
+            for future in as_completed(futures):
+                converted, message = future.result()
+                print(message)
+                converted_count += converted
 
     if converted_count > 0:
         print(f"Successfully converted {converted_count} EMF files.")
 
+def copy_media_part(zf, media_part, dest_dir):
+    """Copies one media part out of the archive; returns its file name."""
+    media_name = posixpath.basename(media_part)
+    with zf.open(media_part) as src, open(dest_dir / media_name, 'wb') as dst:
+        shutil.copyfileobj(src, dst, length=MEDIA_COPY_BUFFER_SIZE)
+    return media_name
+
+def resolve_background_files(output_dir, layouts):
+    """Stores on each layout the background file LaTeX should include.
+
+    The result goes into layout_data['background_image_tex']. EMF images are
+    referenced through their converted PDF, but only when the conversion
+    actually produced one; each distinct image is resolved once.
+    """
+    resolved = {}
+    for layout_data in layouts.values():
+        image_name = layout_data['background_image']
+        if image_name and image_name not in resolved:
+            resolved[image_name] = image_name
+            if image_name.lower().endswith('.emf'):
+                pdf_name = str(Path(image_name).with_suffix('.pdf'))
+                if (output_dir / pdf_name).is_file():
+                    resolved[image_name] = pdf_name
+        layout_data['background_image_tex'] = resolved.get(image_name, image_name)
+
 # --- LaTeX File Generation Functions ---
 
+# --- LaTeX Templates ---
+# Static boilerplate of the generated files, rendered with str.format_map.
+# Literal LaTeX braces are doubled.
+
+_OUTER_PREAMBLE_TMPL = r"""% Outer theme for {theme_name}
+\mode<presentation>
+
+\usepackage{{etoolbox}}
+{tikz_packages}
+% Remove navigation symbols
+\setbeamertemplate{{navigation symbols}}{{}}
+
+% Default Frame title
+\setbeamertemplate{{frametitle}}{{%
+  \vspace{{0.5cm}}
+  \hspace{{1em}}{{\usebeamerfont{{frametitle}}\insertframetitle}}
+  \vspace{{0.2cm}}
+}}
+
+"""
+
+_OUTER_TIKZ_PACKAGES = r"""\RequirePackage{tikz}
+\usetikzlibrary{positioning}
+"""
+
+_FONT_TMPL = r"""% Font theme for {theme_name}
+\mode<presentation>
+
+% Requires XeLaTeX or LuaLaTeX for font support
+\RequirePackage{{fontspec}}
+
+% Theme fonts: major='{major_font_name}', minor='{minor_font_name}'
+{slide_fonts_comment}
+% --- Font Definitions ---
+% Body font (minor font): '{minor_font_label}' -> Using: '{minor_font}'
+\setsansfont{{{minor_font}}}[Ligatures=TeX]
+\setmainfont{{{minor_font}}}[Ligatures=TeX] % Default to sans-serif for main text
+
+% Title font (major font): '{major_font_label}' -> Using: '{major_font}'
+\newfontfamily\titlefont{{{major_font}}}[Ligatures=TeX]
+
+% --- Beamer Font Assignments ---
+\setbeamerfont{{normal text}}{{size=\normalsize}}
+\setbeamerfont{{title}}{{family=\titlefont, size=\huge, series=\bfseries}}
+\setbeamerfont{{frametitle}}{{family=\titlefont, size=\Large, series=\bfseries}}
+\setbeamerfont{{framesubtitle}}{{family=\titlefont, size=\normalsize, series=\mdseries}}
+\setbeamerfont{{subtitle}}{{family=\titlefont, size=\large, series=\mdseries}}
+\setbeamerfont{{author}}{{family=\titlefont, size=\normalsize}}
+\setbeamerfont{{institute}}{{family=\titlefont, size=\small}}
+\setbeamerfont{{date}}{{family=\titlefont, size=\small}}
+\setbeamerfont{{block title}}{{size=\normalsize, series=\bfseries}}
+
+\mode<all>"""
+
+_INNER_TMPL = r"""% Inner theme for {theme_name}
+\mode<presentation>
+
+% Customize itemize, blocks, etc.
+
+% Rounded blocks with shadow
+\setbeamertemplate{{blocks}}[rounded][shadow=true]
+
+% Custom itemize items
+\setbeamertemplate{{itemize items}}[circle]
+
+\mode<all>"""
+
+_MAIN_TMPL = r"""% Main Beamer theme file for {theme_name}
+\NeedsTeXFormat{{LaTeX2e}}
+\ProvidesPackage{{beamertheme{theme_name}}}[{date} v1.0 {title_name} Beamer Theme]
+
+\mode<presentation>
+
+\usecolortheme{{{theme_name}}}
+\usefonttheme{{{theme_name}}}
+\useinnertheme{{{theme_name}}}
+\useoutertheme{{{theme_name}}}
+
+\mode<all>"""
+
+_EXAMPLE_PREAMBLE_TMPL = r"""% Example presentation using the generated theme
+% Compile with XeLaTeX or LuaLaTeX for custom fonts
+
+% !TEX TS-program = lualatex
+
+\documentclass[11pt,aspectratio=169]{{beamer}}
+\usepackage{{graphicx}}
+\usepackage{{tikz}}
+
+\usetheme{{{theme_name}}}
+
+\title{{Sample Presentation}}
+\subtitle{{Generated from PowerPoint Template}}
+\author{{Your Name}}
+\institute{{Your Institution}}
+\date{{\today}}
+
+\begin{{document}}
+
+"""
+
+
+# Pieces emitted for every layout environment in the outer theme. These are
+# %-formatted, so literal percent signs are doubled and braces are not.
+
+_LAYOUT_ENV_BEGIN_TMPL = "\\newenvironment{%s}{%%\n"
+
+_LAYOUT_ACTIVATE_TMPL = r"""  %% ACTIVATE the correct templates for this layout
+  \setbeamertemplate{frametitle}[%(env_name)s]
+  \setbeamertemplate{framesubtitle}[%(env_name)s]
+  %% Original code follows
+"""
+
+_LAYOUT_BG_COLOR_TMPL = r"""  %% Apply solid background color
+  \setbeamercolor{background canvas}{bg=ppt%s}
+"""
+
+_LAYOUT_TEXT_COLORS_TMPL = r"""  %% Apply layout-specific text colors
+  \setbeamercolor{normal text}{fg=ppt%s}
+  \setbeamercolor{structure}{fg=ppt%s}
+"""
+
+_LAYOUT_BG_IMAGE_TMPL = r"""  %% Apply background image
+  \usebackgroundtemplate{\includegraphics[width=\paperwidth,height=\paperheight]{%s}}
+"""
+
+_LAYOUT_BG_IMAGE_OVER_COLOR_TMPL = r"""  %% Apply background with colored background behind transparent PNG
+  \usebackgroundtemplate{%%
+    \begin{picture}(0,0)
+      \put(0,-\paperheight){\textcolor{ppt%s}{\rule{\paperwidth}{\paperheight}}}
+      \put(0,-\paperheight){\includegraphics[width=\paperwidth,height=\paperheight]{%s}}
+    \end{picture}%%
+  }
+"""
+
+_LAYOUT_FRAMETITLE_TMPL = "  \\setbeamercolor{frametitle}{fg=ppt%s}\n"
+_LAYOUT_ITEM_TMPL = "  \\setbeamercolor{item}{fg=ppt%s}\n"
+_LAYOUT_FRAMESUBTITLE_TMPL = "  \\setbeamercolor{framesubtitle}{fg=ppt%s}\n"
+
+_LAYOUT_PLACEHOLDER_TMPL = r"""  %% Custom positioning for %(name)s
+  \setbeamercolor{%(name)s}{fg=ppt%(color)s}
+"""
+
+_LAYOUT_ENV_END = "}{%\n  % End of layout environment\n}\n\n"
+
+def _write_parts(filepath, parts):
+    """Writes the accumulated pieces of a generated file in a single call.
+
+    The text is encoded up front and written in binary mode, bypassing the
+    text-layer wrapper; newlines are written as LF on every platform.
+    """
+    filepath.write_bytes(''.join(parts).encode('utf-8'))
+
 def generate_color_theme(theme_dir, theme_name, colors):
     """Generates the beamercolortheme file."""
     filepath = theme_dir / f"beamercolortheme{theme_name}.sty"
 
-    with open(filepath, 'w') as f:
-        f.write(f"% Color theme for {theme_name}\n")
-        f.write(r"\mode<presentation>" + "\n\n")
-
-        if not colors:
-            f.write("% No colors found in PowerPoint theme\n")
-            f.write("% Using default Beamer colors\n\n")
-            f.write(r"\mode<all>")
-            return
-
-        f.write("% Extracted PowerPoint Colors\n")
-        for name, hex_val in colors.items():
-            if hex_val:  # Ensure hex value exists
-                f.write(f"\\definecolor{{ppt{name}}}{{HTML}}{{{hex_val}}}\n")
-
-        f.write("\n% Color assignments (modify as needed)\n")
-
-        # Use available colors more intelligently
-        available_colors = list(colors.keys())
-
-        # Default mappings with fallbacks
-        color_mappings = [
-            ("normal text", "dk1", "lt1"),
-            ("structure", "accent1", "dk1"),
-            ("frametitle", "lt1", "dk1"),
-            ("framesubtitle", "accent1", ""),
-            ("title", "dk1", "lt1"),
-            ("block title", "lt1", "accent2"),
-            ("block body", "black", "dk1"),
-        ]
+    parts = []
+    parts.append(f"% Color theme for {theme_name}\n")
+    parts.append(r"\mode<presentation>" + "\n\n")
 
-        for element, fg_color, bg_color in color_mappings:
-            fg = f"ppt{fg_color}" if fg_color in available_colors else "black"
-            
-            if bg_color == "":
-                # No background color specified
-                f.write(f"\\setbeamercolor{{{element}}}{{fg={fg}}}\n")
-            else:
-                bg = f"ppt{bg_color}" if bg_color in available_colors else "white"
-                f.write(f"\\setbeamercolor{{{element}}}{{fg={fg},bg={bg}}}\n")
+    if not colors:
+        parts.append("% No colors found in PowerPoint theme\n")
+        parts.append("% Using default Beamer colors\n\n")
+        parts.append(r"\mode<all>")
+        _write_parts(filepath, parts)
+        return
+
+    parts.append("% Extracted PowerPoint Colors\n")
+    parts.append(''.join(
+        f"\\definecolor{{ppt{name}}}{{HTML}}{{{hex_val}}}\n"
+        for name, hex_val in colors.items()
+        if hex_val  # Ensure hex value exists
+    ))
+
+    parts.append("\n% Color assignments (modify as needed)\n")
+
+    # Default mappings with fallbacks
+    color_mappings = [
+        ("normal text", "dk1", "lt1"),
+        ("structure", "accent1", "dk1"),
+        ("frametitle", "lt1", "dk1"),
+        ("framesubtitle", "accent1", ""),
+        ("title", "dk1", "lt1"),
+        ("block title", "lt1", "accent2"),
+        ("block body", "black", "dk1"),
+    ]
 
-        f.write("\n" + r"\mode<all>")
+    def color_assignment(element, fg_color, bg_color):
+        fg = f"ppt{fg_color}" if fg_color in colors else "black"
+        
+        if bg_color == "":
+            # No background color specified
+            return f"\\setbeamercolor{{{element}}}{{fg={fg}}}\n"
+        bg = f"ppt{bg_color}" if bg_color in colors else "white"
+        return f"\\setbeamercolor{{{element}}}{{fg={fg},bg={bg}}}\n"
+
+    parts.append(''.join(color_assignment(*mapping) for mapping in color_mappings))
+
+    parts.append("\n" + r"\mode<all>")
+
+    _write_parts(filepath, parts)
+
+# PowerPoint fonts (matched as substrings, case-insensitively) and the TeX
+# fonts used in their place
+FONT_SUBSTITUTIONS = {
+    'Calibri': 'Helvetica', 'Arial': 'Helvetica', 'Segoe UI': 'Helvetica', 'Tahoma': 'Helvetica',
+    'GT America': 'Helvetica', 'Avenir': 'Helvetica', 'Proxima Nova': 'Helvetica', 'Montserrat': 'Helvetica',
+    'Open Sans': 'Helvetica', 'Source Sans Pro': 'Helvetica', 'Roboto': 'Helvetica', 'Lato': 'Helvetica',
+    'Times New Roman': 'Times', 'Cambria': 'Times'
+}
+_FONT_SUBS = [(ppt_font.lower(), tex_font, ppt_font) for ppt_font, tex_font in FONT_SUBSTITUTIONS.items()]
+
+@functools.lru_cache(maxsize=64)
+def get_compatible_font(font_name):
+    """Returns (TeX font, matched PowerPoint font or None) for a font name."""
+    if not font_name: return "Helvetica", None
+    font_name_lower = font_name.lower()
+    for ppt_font_lower, tex_font, ppt_font in _FONT_SUBS:
+        if ppt_font_lower in font_name_lower:
+            return tex_font, ppt_font
+    return font_name, None
 
 def generate_font_theme(theme_dir, theme_name, fonts, slide_fonts=None):
     """Generates the beamerfonttheme file, respecting major and minor fonts."""
     filepath = theme_dir / f"beamerfonttheme{theme_name}.sty"
 
-    font_substitutions = {
-        'Calibri': 'Helvetica', 'Arial': 'Helvetica', 'Segoe UI': 'Helvetica', 'Tahoma': 'Helvetica',
-        'GT America': 'Helvetica', 'Avenir': 'Helvetica', 'Proxima Nova': 'Helvetica', 'Montserrat': 'Helvetica',
-        'Open Sans': 'Helvetica', 'Source Sans Pro': 'Helvetica', 'Roboto': 'Helvetica', 'Lato': 'Helvetica',
-        'Times New Roman': 'Times', 'Cambria': 'Times'
-    }
-
-    def get_compatible_font(font_name):
-        if not font_name: return "Helvetica", None
-        for ppt_font, tex_font in font_substitutions.items():
-            if ppt_font.lower() in font_name.lower():
-                return tex_font, ppt_font
-        return font_name, None
-
-    with open(filepath, 'w') as f:
-        f.write(f"% Font theme for {theme_name}\n")
-        f.write(r"\mode<presentation>" + "\n\n")
-        f.write("% Requires XeLaTeX or LuaLaTeX for font support\n")
-        f.write(r"\RequirePackage{fontspec}" + "\n\n")
-
-        major_font_name = fonts.get('major', 'Times New Roman')
-        minor_font_name = fonts.get('minor', 'Arial')
-
-        # If slide fonts are detected, they can override the theme minor font
-        if slide_fonts:
-            # A simple heuristic: prefer sans-serif fonts found on slides for body text
-            sans_serif_candidates = ['Arial', 'Helvetica', 'Calibri', 'Segoe UI', 'Avenir', 'Proxima Nova']
-            for cand in sans_serif_candidates:
-                for sf in slide_fonts:
-                    if cand.lower() in sf.lower():
-                        minor_font_name = sf
-                        break
-                if minor_font_name != fonts.get('minor', 'Arial'): break
-        
-        major_font, orig_major = get_compatible_font(major_font_name)
-        minor_font, orig_minor = get_compatible_font(minor_font_name)
-
-        f.write(f"% Theme fonts: major='{major_font_name}', minor='{minor_font_name}'\n")
-        if slide_fonts:
-            f.write(f"% Fonts found in slides: {', '.join(slide_fonts)}\n")
-        
-        f.write("\n% --- Font Definitions ---\n")
-        f.write(f"% Body font (minor font): '{orig_minor or minor_font_name}' -> Using: '{minor_font}'\n")
-        f.write(f"\\setsansfont{{{minor_font}}}[Ligatures=TeX]\n")
-        f.write(f"\\setmainfont{{{minor_font}}}[Ligatures=TeX] % Default to sans-serif for main text\n\n")
-
-        f.write(f"% Title font (major font): '{orig_major or major_font_name}' -> Using: '{major_font}'\n")
-        f.write(f"\\newfontfamily\\titlefont{{{major_font}}}[Ligatures=TeX]\n\n")
-
-        f.write("% --- Beamer Font Assignments ---\n")
-        f.write(r"\setbeamerfont{normal text}{size=\normalsize}" + "\n")
-        f.write(r"\setbeamerfont{title}{family=\titlefont, size=\huge, series=\bfseries}" + "\n")
-        f.write(r"\setbeamerfont{frametitle}{family=\titlefont, size=\Large, series=\bfseries}" + "\n")
-        f.write(r"\setbeamerfont{framesubtitle}{family=\titlefont, size=\normalsize, series=\mdseries}" + "\n")
-        f.write(r"\setbeamerfont{subtitle}{family=\titlefont, size=\large, series=\mdseries}" + "\n")
-        f.write(r"\setbeamerfont{author}{family=\titlefont, size=\normalsize}" + "\n")
-        f.write(r"\setbeamerfont{institute}{family=\titlefont, size=\small}" + "\n")
-        f.write(r"\setbeamerfont{date}{family=\titlefont, size=\small}" + "\n")
-        f.write(r"\setbeamerfont{block title}{size=\normalsize, series=\bfseries}" + "\n")
-
-        f.write("\n" + r"\mode<all>")
-
-def convert_ppt_to_beamer_position(position, paper_width=12192000, paper_height=6858000):
+    major_font_name = fonts.get('major', 'Times New Roman')
+    minor_font_name = fonts.get('minor', 'Arial')
+
+    # If slide fonts are detected, they can override the theme minor font
+    if slide_fonts:
+        # A simple heuristic: prefer sans-serif fonts found on slides for body text
+        sans_serif_candidates = ['arial', 'helvetica', 'calibri', 'segoe ui', 'avenir', 'proxima nova']
+        lowered_slide_fonts = [(sf.lower(), sf) for sf in slide_fonts]
+        for cand in sans_serif_candidates:
+            for sf_lower, sf in lowered_slide_fonts:
+                if cand in sf_lower:
+                    minor_font_name = sf
+                    break
+            if minor_font_name != fonts.get('minor', 'Arial'): break
+    
+    major_font, orig_major = get_compatible_font(major_font_name)
+    minor_font, orig_minor = get_compatible_font(minor_font_name)
+
+    slide_fonts_comment = f"% Fonts found in slides: {', '.join(slide_fonts)}\n" if slide_fonts else ""
+
+    _write_parts(filepath, [_FONT_TMPL.format_map({
+        'theme_name': theme_name,
+        'major_font_name': major_font_name,
+        'minor_font_name': minor_font_name,
+        'slide_fonts_comment': slide_fonts_comment,
+        'minor_font_label': orig_minor or minor_font_name,
+        'minor_font': minor_font,
+        'major_font_label': orig_major or major_font_name,
+        'major_font': major_font,
+    })])
+
+# Standard slide size in EMU, and its approximate size in cm
+SLIDE_WIDTH_EMU, SLIDE_HEIGHT_EMU = 12192000, 6858000
+SLIDE_WIDTH_CM, SLIDE_HEIGHT_CM = 25.4, 19.05
+
+def convert_ppt_to_beamer_position(position, paper_width=SLIDE_WIDTH_EMU, paper_height=SLIDE_HEIGHT_EMU):
     """Convert PowerPoint coordinates to LaTeX/Beamer positioning.
     
     PowerPoint uses EMU (English Metric Units) where:
@@ -592,10 +1148,10 @@ def convert_ppt_to_beamer_position(position, paper_width=12192000, paper_height=
     height_rel = position['height'] / paper_height
     
     # Convert to LaTeX units (approximations for typical slide dimensions)
-    x_cm = x_rel * 25.4  # Approximate slide width in cm
-    y_cm = y_rel * 19.05  # Approximate slide height in cm  
-    width_cm = width_rel * 25.4
-    height_cm = height_rel * 19.05
+    x_cm = x_rel * SLIDE_WIDTH_CM
+    y_cm = y_rel * SLIDE_HEIGHT_CM
+    width_cm = width_rel * SLIDE_WIDTH_CM
+    height_cm = height_rel * SLIDE_HEIGHT_CM
     
     return {
         'x_rel': x_rel,
@@ -608,28 +1164,33 @@ def convert_ppt_to_beamer_position(position, paper_width=12192000, paper_height=
         'height_cm': height_cm
     }
 
-def generate_beamer_frame_template(layout_name, detailed_placeholders):
+def generate_beamer_frame_template(layout_name, detailed_placeholders, env_name=None):
     """Generate custom Beamer templates based on detailed placeholder information."""
     template_lines = []
+    if env_name is None:
+        env_name = sanitize_for_latex(layout_name).lower()
     
     if not detailed_placeholders:
         return []
     
-    # Sort placeholders by vertical position (y coordinate) to render in correct order
-    sorted_placeholders = sorted(
-        detailed_placeholders.items(),
-        key=lambda x: x[1]['position']['y']
-    )
+    # Sort placeholders by vertical position (y coordinate) to render in correct order;
+    # the insertion index keeps ties in their original order and stops the
+    # comparison before it reaches the dicts
+    sorted_placeholders = [
+        (placeholder_info['position']['y'], index, placeholder_key, placeholder_info)
+        for index, (placeholder_key, placeholder_info) in enumerate(detailed_placeholders.items())
+    ]
+    sorted_placeholders.sort()
     
     # Generate integrated frametitle template (includes subtitle)
     template_lines.append(f"% Custom frametitle template for {layout_name}")
-    template_lines.append(f"\\defbeamertemplate{{frametitle}}{{{sanitize_for_latex(layout_name).lower()}}}{{%")
+    template_lines.append(f"\\defbeamertemplate{{frametitle}}{{{env_name}}}{{%")
     template_lines.append("  \\begin{tikzpicture}[remember picture, overlay]")
     
     title_found = False
     subtitle_found = False
     
-    for placeholder_key, placeholder_info in sorted_placeholders:
+    for _, _, placeholder_key, placeholder_info in sorted_placeholders:
         ph_type = placeholder_info['type']
         position = placeholder_info['position']
         styling = placeholder_info['styling']
@@ -637,11 +1198,18 @@ def generate_beamer_frame_template(layout_name, detailed_placeholders):
         # Skip if no position information
         if position['width'] == 0 or position['height'] == 0:
             continue
+
+        # Only title and subtitle placeholders are drawn, so only their
+        # positions need converting
+        is_title = ph_type == 'title'
+        is_subtitle = ph_type == 'body' and ('18' in placeholder_key or 'subtitle' in placeholder_key.lower())
+        if not (is_title or is_subtitle):
+            continue
             
         beamer_pos = convert_ppt_to_beamer_position(position)
         
         # Handle title placeholder
-        if ph_type == 'title':
+        if is_title:
             template_lines.append(f"    % Title placeholder at ({beamer_pos['x_rel']:.3f}, {beamer_pos['y_rel']:.3f})")
             template_lines.append(f"    \\node[anchor=north west, text width={beamer_pos['width_rel']:.3f}\\paperwidth] at ([xshift={beamer_pos['x_rel']:.3f}\\paperwidth, yshift=-{beamer_pos['y_rel']:.3f}\\paperheight] current page.north west) {{")
             template_lines.append(f"      \\usebeamerfont{{frametitle}}\\usebeamercolor[fg]{{frametitle}}\\insertframetitle")
@@ -649,7 +1217,7 @@ def generate_beamer_frame_template(layout_name, detailed_placeholders):
             title_found = True
         
         # Handle subtitle placeholder (body_18 with accent1 color) - integrate into frametitle template
-        elif ph_type == 'body' and ('18' in placeholder_key or 'subtitle' in placeholder_key.lower()):
+        elif is_subtitle:
             template_lines.append(f"    % Subtitle placeholder at ({beamer_pos['x_rel']:.3f}, {beamer_pos['y_rel']:.3f})")
             template_lines.append(f"    \\ifx\\insertframesubtitle\\@empty\\else")
             template_lines.append(f"    \\node[anchor=north west, text width={beamer_pos['width_rel']:.3f}\\paperwidth] at ([xshift={beamer_pos['x_rel']:.3f}\\paperwidth, yshift=-{beamer_pos['y_rel']:.3f}\\paperheight] current page.north west) {{")
@@ -664,7 +1232,7 @@ def generate_beamer_frame_template(layout_name, detailed_placeholders):
     
     # Generate framesubtitle template (now integrated above)
     template_lines.append(f"% Custom framesubtitle template for {layout_name} (now integrated above)")
-    template_lines.append(f"\\defbeamertemplate{{framesubtitle}}{{{sanitize_for_latex(layout_name).lower()}}}{{%")
+    template_lines.append(f"\\defbeamertemplate{{framesubtitle}}{{{env_name}}}{{%")
     template_lines.append("  % This template is now integrated into the frametitle template above")
     template_lines.append("}")
     template_lines.append("")
@@ -672,275 +1240,279 @@ def generate_beamer_frame_template(layout_name, detailed_placeholders):
     return template_lines
 
 def generate_outer_theme(theme_dir, theme_name, layouts, styling_info):
-    """Generates the beameroutertheme file with layout-specific environments."""
+    """Generates the beameroutertheme file with layout-specific environments.
+
+    Background images are included through the file chosen by
+    resolve_background_files, when it has been run.
+    """
     filepath = theme_dir / f"beameroutertheme{theme_name}.sty"
 
     # Check if any layouts need TikZ for detailed positioning
     needs_tikz = any(layout_data.get('detailed_placeholders', {}) for layout_data in layouts.values())
     
-    with open(filepath, 'w') as f:
-        f.write(f"% Outer theme for {theme_name}\n")
-        f.write(r"\mode<presentation>" + "\n\n")
-        f.write(r"\usepackage{etoolbox}" + "\n")
-        if needs_tikz:
-            f.write(r"\RequirePackage{tikz}" + "\n")
-            f.write(r"\usetikzlibrary{positioning}" + "\n")
-        f.write("\n")
-        f.write(r"% Remove navigation symbols" + "\n")
-        f.write(r"\setbeamertemplate{navigation symbols}{}" + "\n\n")
-
-        # Default frametitle
-        f.write("% Default Frame title\n")
-        f.write(r"\setbeamertemplate{frametitle}{%" + "\n")
-        f.write(r"  \vspace{0.5cm}" + "\n")
-        f.write(r"  \hspace{1em}{\usebeamerfont{frametitle}\insertframetitle}" + "\n")
-        f.write(r"  \vspace{0.2cm}" + "\n")
-        f.write(r"}" + "\n\n")
-
-        # Layout environments
-        f.write("% --- Slide Layout Environments ---\n")
-        for layout_name, layout_data in layouts.items():
-            env_name = sanitize_for_latex(layout_data['name']).lower()
-            f.write(f"\\newenvironment{{{env_name}}}{{%" + "\n")
-            
-            # ACTIVATE custom templates if they exist
-            detailed_placeholders = layout_data.get('detailed_placeholders')
-            if detailed_placeholders:
-                f.write(f"  % ACTIVATE the correct templates for this layout\n")
-                f.write(f"  \\setbeamertemplate{{frametitle}}[{env_name}]\n")
-                f.write(f"  \\setbeamertemplate{{framesubtitle}}[{env_name}]\n")
-                f.write(f"  % Original code follows\n")
-            
-            # Apply solid background color only if no background image
-            if layout_data['background_color'] and not layout_data['background_image']:
-                bg_color = layout_data['background_color']
-                # Resolve through color overrides if present
-                if layout_data['color_overrides']:
-                    bg_color = layout_data['color_overrides'].get(bg_color, bg_color)
-                f.write(f"  % Apply solid background color\n")
-                f.write(f"  \\setbeamercolor{{background canvas}}{{bg=ppt{bg_color}}}\n")
-            
-            # Apply color overrides for text (when background image exists)
-            if layout_data['color_overrides'] and layout_data['background_image']:
-                f.write("  % Apply layout-specific text colors\n")
-                tx1_mapped = layout_data['color_overrides'].get('tx1', 'tx1')
-                f.write(f"  \\setbeamercolor{{normal text}}{{fg=ppt{tx1_mapped}}}\n")
-                
-                # Handle tx2 color overrides for body text
-                tx2_mapped = layout_data['color_overrides'].get('tx2', 'tx2')
-                f.write(f"  \\setbeamercolor{{structure}}{{fg=ppt{tx2_mapped}}}\n")
-
-            # Apply background using picture environment for proper layering
-            if layout_data['background_image']:
-                img_path = Path(layout_data['background_image'])
-                if img_path.suffix.lower() == '.emf':
-                    img_path = img_path.with_suffix('.pdf')
-                
-                if layout_data['background_color']:
-                    # Layer transparent image over solid color background
-                    bg_color = layout_data['background_color']
-                    if layout_data['color_overrides']:
-                        bg_color = layout_data['color_overrides'].get(bg_color, bg_color)
-                    f.write(f"  % Apply background with colored background behind transparent PNG\n")
-                    f.write(f"  \\usebackgroundtemplate{{%\n")
-                    f.write(f"    \\begin{{picture}}(0,0)\n")
-                    f.write(f"      \\put(0,-\\paperheight){{\\textcolor{{ppt{bg_color}}}{{\\rule{{\\paperwidth}}{{\\paperheight}}}}}}\n")
-                    f.write(f"      \\put(0,-\\paperheight){{\\includegraphics[width=\\paperwidth,height=\\paperheight]{{{img_path}}}}}\n")
-                    f.write(f"    \\end{{picture}}%\n")
-                    f.write(f"  }}\n")
-                else:
-                    # Just the image without solid background
-                    f.write(f"  % Apply background image\n")
-                    f.write(f"  \\usebackgroundtemplate{{\\includegraphics[width=\\paperwidth,height=\\paperheight]{{{img_path}}}}}\n")
-            elif not layout_data['background_color']:
-                # Only clear background if no solid color is set
-                f.write("  \\usebackgroundtemplate{}\n")
-            
-            # Set placeholder-specific colors
-            placeholders = layout_data.get('placeholders', {})
-            
-            # Frametitle color - check master title style first, then placeholders
-            title_color = placeholders.get('title')
-            if not title_color:
-                # If no explicit title color in layout, use master title style (tx2)
-                title_color = 'tx2'
-            if layout_data['color_overrides']:
-                title_color = layout_data['color_overrides'].get(title_color, title_color)
-            f.write(f"  \\setbeamercolor{{frametitle}}{{fg=ppt{title_color}}}\n")
-            
-            # Handle body text color for tx2 elements
-            body_color = placeholders.get('body', 'tx2')
-            if layout_data['color_overrides']:
-                body_color = layout_data['color_overrides'].get(body_color, body_color)
-            f.write(f"  \\setbeamercolor{{item}}{{fg=ppt{body_color}}}\n")
-            
-            # Handle subtitle if present - check for accent1 usage and indexed placeholders
-            subtitle_found = False
-            for placeholder_key, color in placeholders.items():
-                if 'subtitle' in placeholder_key or (color == 'accent1'):
-                    subtitle_color = color
-                    if layout_data['color_overrides']:
-                        subtitle_color = layout_data['color_overrides'].get(subtitle_color, subtitle_color)
-                    f.write(f"  \\setbeamercolor{{framesubtitle}}{{fg=ppt{subtitle_color}}}\n")
-                    subtitle_found = True
-                    break
+    parts = [_OUTER_PREAMBLE_TMPL.format_map({
+        'theme_name': theme_name,
+        'tikz_packages': _OUTER_TIKZ_PACKAGES if needs_tikz else '',
+    })]
+
+    # Layout environments
+    parts.append("% --- Slide Layout Environments ---\n")
+    for layout_name, layout_data in layouts.items():
+        env_name = layout_data['env_name']
+        background_color = layout_data['background_color']
+        background_image = layout_data['background_image']
+        placeholders = layout_data.get('placeholders', {})
+        detailed_placeholders = layout_data.get('detailed_placeholders')
+        # Resolves a scheme color through the layout's color overrides, if any
+        overrides = layout_data['color_overrides'] or {}
+        resolve = overrides.get
+        parts.append(_LAYOUT_ENV_BEGIN_TMPL % env_name)
+        
+        # ACTIVATE custom templates if they exist
+        if detailed_placeholders:
+            parts.append(_LAYOUT_ACTIVATE_TMPL % {'env_name': env_name})
+        
+        # Apply solid background color only if no background image
+        if background_color and not background_image:
+            bg_color = resolve(background_color, background_color)
+            parts.append(_LAYOUT_BG_COLOR_TMPL % bg_color)
+        
+        # Apply color overrides for text (when background image exists)
+        if overrides and background_image:
+            tx1_mapped = resolve('tx1', 'tx1')
+            # Handle tx2 color overrides for body text
+            tx2_mapped = resolve('tx2', 'tx2')
+            parts.append(_LAYOUT_TEXT_COLORS_TMPL % (tx1_mapped, tx2_mapped))
+
+        # Apply background using picture environment for proper layering
+        if background_image:
+            img_path = layout_data.get('background_image_tex', background_image)
             
-            # If no explicit subtitle found but we have accent1 placeholders, use accent1 for subtitle
-            if not subtitle_found:
-                for placeholder_key, color in placeholders.items():
-                    if color == 'accent1':
-                        f.write(f"  \\setbeamercolor{{framesubtitle}}{{fg=pptaccent1}}\n")
-                        break
-
-            # Add custom positioning for placeholders
-            if placeholders:
-                for placeholder_type, color in placeholders.items():
-                    if placeholder_type.startswith('placeholder_'):
-                        # Add placeholder-specific positioning
-                        placeholder_num = placeholder_type.split('_')[1]
-                        f.write(f"  % Custom positioning for {placeholder_type}\n")
-                        f.write(f"  \setbeamercolor{{{placeholder_type}}}{{fg=ppt{color}}}\n")
-                
-            f.write("}{%" + "\n")
-            f.write("  % End of layout environment\n")
-            f.write("}\n\n")
+            if background_color:
+                # Layer transparent image over solid color background
+                bg_color = resolve(background_color, background_color)
+                parts.append(_LAYOUT_BG_IMAGE_OVER_COLOR_TMPL % (bg_color, img_path))
+            else:
+                # Just the image without solid background
+                parts.append(_LAYOUT_BG_IMAGE_TMPL % img_path)
+        elif not background_color:
+            # Only clear background if no solid color is set
+            parts.append("  \\usebackgroundtemplate{}\n")
+        
+        # Set placeholder-specific colors
+        # Frametitle color - check master title style first, then placeholders
+        title_color = placeholders.get('title')
+        if not title_color:
+            # If no explicit title color in layout, use master title style (tx2)
+            title_color = 'tx2'
+        title_color = resolve(title_color, title_color)
+        parts.append(_LAYOUT_FRAMETITLE_TMPL % title_color)
+        
+        # Handle body text color for tx2 elements
+        body_color = placeholders.get('body', 'tx2')
+        body_color = resolve(body_color, body_color)
+        parts.append(_LAYOUT_ITEM_TMPL % body_color)
+        
+        # Handle subtitle if present - check for accent1 usage and indexed placeholders.
+        # Any accent1 placeholder already matches here, so no second scan is needed
+        subtitle_key = next((placeholder_key for placeholder_key, color in placeholders.items()
+                             if 'subtitle' in placeholder_key or color == 'accent1'), None)
+        if subtitle_key is not None:
+            subtitle_color = placeholders[subtitle_key]
+            subtitle_color = resolve(subtitle_color, subtitle_color)
+            parts.append(_LAYOUT_FRAMESUBTITLE_TMPL % subtitle_color)
+
+        # Add custom positioning for placeholders
+        if placeholders:
+            for placeholder_type, color in placeholders.items():
+                if placeholder_type.startswith('placeholder_'):
+                    # Add placeholder-specific positioning
+                    placeholder_num = placeholder_type.split('_')[1]
+                    parts.append(_LAYOUT_PLACEHOLDER_TMPL % {'name': placeholder_type, 'color': color})
             
-            # Custom frame templates for detailed positioning
-            detailed_placeholders = layout_data.get('detailed_placeholders')
-            if detailed_placeholders:
-                frame_template_lines = generate_beamer_frame_template(layout_name, detailed_placeholders)
-                for line in frame_template_lines:
-                    f.write(line + "\n")
-                f.write("\n")
+        parts.append(_LAYOUT_ENV_END)
+        
+        # Custom frame templates for detailed positioning
+        if detailed_placeholders:
+            frame_template_lines = generate_beamer_frame_template(layout_name, detailed_placeholders, env_name)
+            parts.extend(line + "\n" for line in frame_template_lines)
+            parts.append("\n")
+
+    parts.append(r"\mode<all>")
 
-        f.write(r"\mode<all>")
+    _write_parts(filepath, parts)
 
 def generate_inner_theme(theme_dir, theme_name):
     """Generates the beamerinnertheme file."""
     filepath = theme_dir / f"beamerinnertheme{theme_name}.sty"
 
-    with open(filepath, 'w') as f:
-        f.write(f"% Inner theme for {theme_name}\n")
-        f.write(r"\mode<presentation>" + "\n\n")
-        f.write("% Customize itemize, blocks, etc.\n\n")
-        f.write("% Rounded blocks with shadow\n")
-        f.write(r"\setbeamertemplate{blocks}[rounded][shadow=true]" + "\n\n")
-        f.write("% Custom itemize items\n")
-        f.write(r"\setbeamertemplate{itemize items}[circle]" + "\n\n")
-        f.write(r"\mode<all>")
+    _write_parts(filepath, [_INNER_TMPL.format_map({'theme_name': theme_name})])
 
 def generate_main_theme_file(theme_dir, theme_name):
     """Generates the main beamertheme file."""
     filepath = theme_dir / f"beamertheme{theme_name}.sty"
     current_date = datetime.now().strftime("%Y/%m/%d")
 
-    with open(filepath, 'w') as f:
-        f.write(f"% Main Beamer theme file for {theme_name}\n")
-        f.write(r"\NeedsTeXFormat{LaTeX2e}" + "\n")
-        f.write(f"\\ProvidesPackage{{beamertheme{theme_name}}}[{current_date} v1.0 {theme_name.title()} Beamer Theme]\n\n")
-        f.write(r"\mode<presentation>" + "\n\n")
-        f.write(f"\\usecolortheme{{{theme_name}}}\n")
-        f.write(f"\\usefonttheme{{{theme_name}}}\n")
-        f.write(f"\\useinnertheme{{{theme_name}}}\n")
-        f.write(f"\\useoutertheme{{{theme_name}}}\n")
-        f.write("\n" + r"\mode<all>")
+    _write_parts(filepath, [_MAIN_TMPL.format_map({
+        'theme_name': theme_name,
+        'date': current_date,
+        'title_name': theme_name.title(),
+    })])
 
 def generate_example_file(theme_dir, theme_name, layouts, media_files):
     """Generates an example .tex file demonstrating the layouts."""
     filepath = theme_dir / "example.tex"
 
-    with open(filepath, 'w') as f:
-        f.write("% Example presentation using the generated theme\n")
-        f.write("% Compile with XeLaTeX or LuaLaTeX for custom fonts\n\n")
-        f.write("% !TEX TS-program = lualatex\n\n")
-        f.write(r"\documentclass[11pt,aspectratio=169]{beamer}" + "\n")
-        f.write(r"\usepackage{graphicx}" + "\n")
-        f.write(r"\usepackage{tikz}" + "\n\n")
-        f.write(f"\\usetheme{{{theme_name}}}\n\n")
-        f.write(r"\title{Sample Presentation}" + "\n")
-        f.write(r"\subtitle{Generated from PowerPoint Template}" + "\n")
-        f.write(r"\author{Your Name}" + "\n")
-        f.write(r"\institute{Your Institution}" + "\n")
-        f.write(r"\date{\today}" + "\n\n")
-        f.write(r"\begin{document}" + "\n\n")
-
-        # Demonstrate each layout
-        for layout_name, layout_data in layouts.items():
-            env_name = sanitize_for_latex(layout_data['name']).lower()
-            f.write(f"% Frame using the '{layout_name}' layout\n")
-            f.write(f"\\begin{{{env_name}}}\n")
-            f.write(f"  \\begin{{frame}}\n")
-            f.write(f"    \\frametitle{{{layout_name} Layout}}\n")
-            
-            # Add subtitle for layouts that have subtitle placeholders
-            if '1 Column - Subhead' in layout_name:
-                f.write(f"    \\framesubtitle{{This is the blue subtitle text}}\n")
-            elif 'Executive Summary' in layout_name:
-                f.write(f"    \\framesubtitle{{Key Takeaways for Q3 2024}}\n")
-            
-            f.write(f"    This frame uses the \\texttt{{{env_name}}} environment.\n")
-            if layout_data['background_image']:
-                f.write(f"    It includes the background image: {layout_data['background_image']}\n")
-            f.write(r"  \end{frame}" + "\n")
-            f.write(f"\\end{{{env_name}}}\n\n")
+    parts = [_EXAMPLE_PREAMBLE_TMPL.format_map({'theme_name': theme_name})]
+
+    # Demonstrate each layout
+    for layout_name, layout_data in layouts.items():
+        env_name = layout_data['env_name']
+        parts.append(f"% Frame using the '{layout_name}' layout\n")
+        parts.append(f"\\begin{{{env_name}}}\n")
+        parts.append(f"  \\begin{{frame}}\n")
+        parts.append(f"    \\frametitle{{{layout_name} Layout}}\n")
+        
+        # Add subtitle for layouts that have subtitle placeholders
+        if '1 Column - Subhead' in layout_name:
+            parts.append(f"    \\framesubtitle{{This is the blue subtitle text}}\n")
+        elif 'Executive Summary' in layout_name:
+            parts.append(f"    \\framesubtitle{{Key Takeaways for Q3 2024}}\n")
+        
+        parts.append(f"    This frame uses the \\texttt{{{env_name}}} environment.\n")
+        if layout_data['background_image']:
+            parts.append(f"    It includes the background image: {layout_data['background_image']}\n")
+        parts.append(r"  \end{frame}" + "\n")
+        parts.append(f"\\end{{{env_name}}}\n\n")
+
+    parts.append(r"\end{document}" + "\n")
+
+    _write_parts(filepath, parts)
+
+# Layout fields listed in the conversion report, in order
+_REPORT_LAYOUT_FIELDS = (
+    ('Background Color', 'background_color'),
+    ('Background Image', 'background_image'),
+    ('Placeholders', 'placeholders'),
+    ('Color Overrides', 'color_overrides'),
+)
+
+_REPORT_NOTES = """## Conversion Limitations
+
+### What Cannot Be Converted Automatically
+- **Exact positioning**: PowerPoint positioning differs from LaTeX
+- **Complex vector graphics**: Shapes and drawings are not converted.
+- **Animations**: PowerPoint animations are not supported in Beamer
 
-        f.write(r"\end{document}" + "\n")
+### Suggested Manual Adjustments
+1. **Review Layouts**: Check the generated environments for each slide layout.
+2. **Customize Fonts**: Install corporate fonts or adjust substitutions in `beamerfonttheme.sty`.
+3. **Add Logos**: Manually add company logos using `\\includegraphics`.
+"""
 
 def generate_conversion_report(output_dir, colors, fonts, slide_fonts, layouts, styling_info):
     """Generates a conversion report with notes about visual fidelity."""
     filepath = output_dir / "CONVERSION_NOTES.md"
     
-    with open(filepath, 'w') as f:
-        f.write("# PowerPoint to Beamer Conversion Report\n\n")
-        f.write("## What Was Successfully Converted\n\n")
-        
-        # Colors
-        f.write(f"### Colors ({len(colors)} found)\n")
-        if colors:
-            for name, hex_val in list(colors.items())[:10]:  # Show first 10
-                f.write(f"- `{name}`: #{hex_val}\n")
-            if len(colors) > 10:
-                f.write(f"- ...and {len(colors) - 10} more colors\n")
-        else:
-            f.write("- No colors extracted\n")
-        f.write("\n")
-        
-        # Fonts
-        f.write(f"### Fonts\n")
-        if fonts:
-            f.write(f"- Theme fonts: {fonts}\n")
-        if slide_fonts:
-            f.write(f"- Fonts used in slides: {', '.join(slide_fonts)}\n")
-        if not fonts and not slide_fonts:
-            f.write("- No fonts detected\n")
-        f.write("\n")
-        
-        # Layouts
-        f.write(f"### Slide Layouts ({len(layouts)} found)\n")
-        for layout_name, layout_data in layouts.items():
-            f.write(f"- **{layout_name}**\n")
-            if layout_data['background_color']:
-                f.write(f"  - Background Color: `{layout_data['background_color']}`\n")
-            if layout_data['background_image']:
-                f.write(f"  - Background Image: `{layout_data['background_image']}`\n")
-            if layout_data['placeholders']:
-                f.write(f"  - Placeholders: `{layout_data['placeholders']}`\n")
-            if layout_data['color_overrides']:
-                f.write(f"  - Color Overrides: `{layout_data['color_overrides']}`\n")
-        f.write("\n")
-        
-        # Limitations
-        f.write("## Conversion Limitations\n\n")
-        f.write("### What Cannot Be Converted Automatically\n")
-        f.write("- **Exact positioning**: PowerPoint positioning differs from LaTeX\n")
-        f.write("- **Complex vector graphics**: Shapes and drawings are not converted.\n")
-        f.write("- **Animations**: PowerPoint animations are not supported in Beamer\n\n")
-        
-        # Manual adjustments
-        f.write("### Suggested Manual Adjustments\n")
-        f.write("1. **Review Layouts**: Check the generated environments for each slide layout.\n")
-        f.write("2. **Customize Fonts**: Install corporate fonts or adjust substitutions in `beamerfonttheme.sty`.\n")
-        f.write("3. **Add Logos**: Manually add company logos using `\\includegraphics`.\n")
+    parts = []
+    parts.append("# PowerPoint to Beamer Conversion Report\n\n")
+    parts.append("## What Was Successfully Converted\n\n")
+    
+    # Colors
+    parts.append(f"### Colors ({len(colors)} found)\n")
+    if colors:
+        parts.append(''.join(f"- `{name}`: #{hex_val}\n"
+                             for name, hex_val in islice(colors.items(), 10)))  # Show first 10
+        if len(colors) > 10:
+            parts.append(f"- ...and {len(colors) - 10} more colors\n")
+    else:
+        parts.append("- No colors extracted\n")
+    parts.append("\n")
+    
+    # Fonts
+    parts.append(f"### Fonts\n")
+    if fonts:
+        parts.append(f"- Theme fonts: {fonts}\n")
+    if slide_fonts:
+        parts.append(f"- Fonts used in slides: {', '.join(slide_fonts)}\n")
+    if not fonts and not slide_fonts:
+        parts.append("- No fonts detected\n")
+    parts.append("\n")
+    
+    # Layouts
+    parts.append(f"### Slide Layouts ({len(layouts)} found)\n")
+    for layout_name, layout_data in layouts.items():
+        parts.append(f"- **{layout_name}**\n")
+        parts.append(''.join(f"  - {label}: `{layout_data[key]}`\n"
+                             for label, key in _REPORT_LAYOUT_FIELDS if layout_data[key]))
+    parts.append("\n")
+    
+    # Limitations and manual adjustments
+    parts.append(_REPORT_NOTES)
+
+    _write_parts(filepath, parts)
+
+
+# --- Output Directory Handling ---
+
+def file_digest(path):
+    """Returns a content hash used to detect files that did not change."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(MEDIA_COPY_BUFFER_SIZE), b''):
+            digest.update(chunk)
+    return digest.digest()
+
+# Lists the files written by the last run, so a re-run can drop the ones it no
+# longer produces without touching files the user added
+MANIFEST_NAME = ".pptx2beamer-files"
+
+def read_manifest(output_dir):
+    """Returns the file names recorded by the previous run, if any."""
+    try:
+        return set((output_dir / MANIFEST_NAME).read_text(encoding='utf-8').splitlines())
+    except FileNotFoundError:
+        return set()
+
+def write_manifest(output_dir, file_names):
+    """Records the file names written by this run."""
+    (output_dir / MANIFEST_NAME).write_text(
+        ''.join(f"{name}\n" for name in sorted(file_names)), encoding='utf-8')
+
+def publish_staged_files(staging_dir, output_dir):
+    """Moves staged files whose content differs into the output directory.
+
+    Returns the number of files that were added, replaced or removed. Files
+    already present with identical content are left untouched. Files the
+    previous run wrote but this one did not stage are deleted, as is the PDF
+    next to a replaced EMF file, so no output from an older deck survives.
+    """
+    with os.scandir(staging_dir) as entries:
+        staged_entries = list(entries)
+    staged_names = {staged_entry.name for staged_entry in staged_entries}
+    stale_names = read_manifest(output_dir) - staged_names
+
+    updated_count = 0
+    for staged_entry in staged_entries:
+        target = output_dir / staged_entry.name
+        if target.is_file():
+            if file_digest(target) == file_digest(staged_entry.path):
+                continue
+            if staged_entry.name.lower().endswith('.emf'):
+                pdf_name = str(Path(staged_entry.name).with_suffix('.pdf'))
+                if pdf_name not in staged_names:
+                    stale_names.add(pdf_name)
+        os.replace(staged_entry.path, target)
+        updated_count += 1
+
+    for stale_name in stale_names:
+        stale_file = output_dir / stale_name
+        if stale_file.is_file():
+            stale_file.unlink()
+            updated_count += 1
+
+    write_manifest(output_dir, staged_names)
+    return updated_count
 
 
 # --- Main Function ---
@@ -953,12 +1525,17 @@ def main():
 Examples:
   python pptx2beamer.py template.pptx
   python pptx2beamer.py template.pptx -o mytheme
+  python pptx2beamer.py template.pptx --report
         """
     )
     parser.add_argument("pptx_file", type=Path,
                        help="Path to the input .pptx file")
     parser.add_argument("--output-dir", "-o", type=str, default=None,
                        help="Output directory name (default: beamertheme_<filename>)")
+    parser.add_argument("--force", action="store_true",
+                       help="Delete an existing output directory and rebuild it from scratch")
+    parser.add_argument("--report", action="store_true",
+                       help="Also write CONVERSION_NOTES.md describing what was converted")
 
     args = parser.parse_args()
 
@@ -982,69 +1559,118 @@ Examples:
         output_dir = Path(f"beamertheme_{base_name}")
         theme_name = base_name
 
-    # Clean theme name
-    theme_name = ''.join(c for c in theme_name if c.isalnum())
+    # Clean theme name; non-ASCII letters and digits are kept as well
+    if theme_name.isascii():
+        theme_name = theme_name.translate(_SANITIZE_TABLE)
+    else:
+        theme_name = ''.join(c for c in theme_name if c.isalnum())
     if not theme_name:
         theme_name = "custom"
 
     print(f"Processing: {args.pptx_file}")
     print(f"Output directory: {output_dir}")
     print(f"Theme name: {theme_name}")
+    if _PURE_PYTHON_XML:
+        print("Warning: Only the pure-Python XML parser is available; install lxml for faster parsing.")
 
-    # Create output directory
-    if output_dir.exists():
-        shutil.rmtree(output_dir)
-    output_dir.mkdir(parents=True)
-
-    # Process PowerPoint file
-    with tempfile.TemporaryDirectory() as temp_dir:
-        temp_path = Path(temp_dir)
+    # Process PowerPoint file, reading parts straight from the archive
+    try:
+        zf = zipfile.ZipFile(args.pptx_file, 'r')
+    except (zipfile.BadZipFile, PermissionError) as e:
+        print(f"Error: Could not open '{args.pptx_file}': {e}")
+        sys.exit(1)
 
-        # Extract PPTX
+    # Create output directory. An existing one is rebuilt in a staging
+    # directory next to it, and only files whose content changed are swapped
+    # in, so earlier EMF conversions survive a re-run.
+    if output_dir.exists() and args.force:
+        # Move the old directory aside and delete it while the conversion runs
+        backup_dir = output_dir.with_name(f".{output_dir.name}.bak.{os.getpid()}")
         try:
-            with zipfile.ZipFile(args.pptx_file, 'r') as zip_ref:
-                zip_ref.extractall(temp_path)
-        except (zipfile.BadZipFile, PermissionError) as e:
-            print(f"Error: Could not extract '{args.pptx_file}': {e}")
-            sys.exit(1)
-
-        # Parse theme data
-        theme_xml_path = temp_path / "ppt" / "theme" / "theme1.xml"
-        colors, fonts = parse_theme_xml(theme_xml_path)
-        slide_fonts = extract_fonts_from_slides(temp_path)
-        layouts = parse_slide_layouts(temp_path, colors)
-        styling_info = parse_slide_master_styling(temp_path)
-
-        print(f"Found {len(colors)} colors, {len(fonts)} theme fonts, {len(slide_fonts)} slide fonts, {len(layouts)} layouts")
-        if slide_fonts:
-            print(f"Slide fonts detected: {', '.join(slide_fonts[:5])}" + ("..." if len(slide_fonts) > 5 else ""))
-        if styling_info['has_footer_elements']:
-            print(f"Detected footer elements: {', '.join(styling_info['footer_elements'])}")
-
-        # Copy media files
-        media_files = []
-        media_path = temp_path / "ppt" / "media"
-        if media_path.exists():
-            for media_file in media_path.iterdir():
-                if media_file.is_file():
-                    shutil.copy2(media_file, output_dir)
-                    media_files.append(media_file.name)
-            print(f"Copied {len(media_files)} media files")
+            output_dir.rename(backup_dir)
+        except OSError:
+            shutil.rmtree(output_dir)
+        else:
+            threading.Thread(target=shutil.rmtree, args=(backup_dir,),
+                             kwargs={'ignore_errors': True}).start()
+    if output_dir.exists():
+        build_dir = Path(tempfile.mkdtemp(prefix=f".{output_dir.name}-", dir=output_dir.parent))
+        previous_dir = output_dir
+    else:
+        output_dir.mkdir(parents=True)
+        build_dir = output_dir
+        previous_dir = None
+
+    try:
+        with zf:
+            # List the slide, master and layout parts once for all parsers
+            part_index = _scan_ppt_dirs(zf)
+
+            # Parse theme data. The parsers read separate parts, so the slide
+            # fonts and master styling load alongside the theme, and the
+            # layouts follow once the theme colors are known.
+            # Parsed rels parts, shared by everything that resolves images
+            rels_cache = {}
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                theme_future = executor.submit(parse_theme_xml, zf, "ppt/theme/theme1.xml")
+                fonts_future = executor.submit(extract_fonts_from_slides, zf, part_index)
+                styling_future = executor.submit(parse_slide_master_styling, zf, part_index)
+                colors, fonts = theme_future.result()
+                layouts = parse_slide_layouts(zf, colors, rels_cache, part_index)
+                slide_fonts = fonts_future.result()
+                styling_info = styling_future.result()
+
+            print(f"Found {len(colors)} colors, {len(fonts)} theme fonts, {len(slide_fonts)} slide fonts, {len(layouts)} layouts")
+            if slide_fonts:
+                print(f"Slide fonts detected: {', '.join(slide_fonts[:5])}" + ("..." if len(slide_fonts) > 5 else ""))
+            if styling_info['has_footer_elements']:
+                print(f"Detected footer elements: {', '.join(styling_info['footer_elements'])}")
+
+            # Copy media files
+            media_parts = _list_parts(zf, 'ppt/media', suffix='')
+            media_files = _map_parts(lambda media_part: copy_media_part(zf, media_part, build_dir), media_parts)
+            if media_files:
+                print(f"Copied {len(media_files)} media files")
 
         # Convert EMF files
-        convert_emf_to_pdf(output_dir)
+        convert_emf_to_pdf(build_dir, previous_dir)
+        resolve_background_files(build_dir, layouts)
 
         # Generate theme files
         print("Generating theme files...")
-        generate_color_theme(output_dir, theme_name, colors)
-        generate_font_theme(output_dir, theme_name, fonts, slide_fonts)
-        generate_outer_theme(output_dir, theme_name, layouts, styling_info)
-        generate_inner_theme(output_dir, theme_name)
-        generate_main_theme_file(output_dir, theme_name)
-        generate_example_file(output_dir, theme_name, layouts, media_files)
-        
-        # Generate conversion report
-        generate_conversion_report(output_dir, colors, fonts, slide_fonts, layouts, styling_info)
+        generators = [
+            (generate_color_theme, (build_dir, theme_name, colors)),
+            (generate_font_theme, (build_dir, theme_name, fonts, slide_fonts)),
+            (generate_outer_theme, (build_dir, theme_name, layouts, styling_info)),
+            (generate_inner_theme, (build_dir, theme_name)),
+            (generate_main_theme_file, (build_dir, theme_name)),
+            (generate_example_file, (build_dir, theme_name, layouts, media_files)),
+        ]
+        if args.report:
+            # Generate conversion report
+            generators.append((generate_conversion_report,
+                               (build_dir, colors, fonts, slide_fonts, layouts, styling_info)))
+
+        # Each generator only reads the parsed data and writes its own file,
+        # so they run side by side; result() re-raises any failure
+        with ThreadPoolExecutor(max_workers=len(generators)) as executor:
+            futures = [executor.submit(generate, *generate_args)
+                       for generate, generate_args in generators]
+        for future in futures:
+            future.result()
+
+        if previous_dir is not None:
+            updated_count = publish_staged_files(build_dir, output_dir)
+            print(f"Updated {updated_count} changed files in {output_dir}")
+            if not args.report:
+                # A report left by an earlier --report run describes an older extraction
+                (output_dir / "CONVERSION_NOTES.md").unlink(missing_ok=True)
+        else:
+            with os.scandir(build_dir) as entries:
+                write_manifest(build_dir, [entry.name for entry in entries])
+    finally:
+        if previous_dir is not None:
+            shutil.rmtree(build_dir, ignore_errors=True)
 
     print("\n" + "="*60)
     print("🎉 Beamer Theme Generation Complete!")
@@ -1056,7 +1682,7 @@ Examples:
     print(f"3. Review and customize the .sty files as needed")
 
     print(f"\nNote: If background images are missing, placeholder backgrounds will be used.")
-    print(f"Background commands available: \\usebackground1 through \\usebackground5")
+    print(f"Background commands available: \\usebackground1 through \\usebackground{MAX_BACKGROUNDS}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file